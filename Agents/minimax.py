@@ -1,19 +1,52 @@
-from Board_Evals.eval_new import BoardEvaluator as NewEvaluator
-from Board_Evals.eval_old import BoardEvaluator as OldEvaluator
+import time
+
+from Board_Evals.evaluators import get_evaluator
+from utils.deadline import Deadline
 from utils.engine import GameBoard, Player
-from utils.negamax import negamax
+from utils.negamax import aspiration_search
 from utils.transposition_table import TranspositionTable
 
 
 class MinimaxBot:
+    # Deepest search; reached only if time_per_move allows
     SEARCH_DEPTH = 22
+    # Set a small buffer to ensure we stop search before deadline
+    TIME_BUFFER_MS = 1.0
+    # Half-width of the search window around the previous score (scores are small integers)
+    ASPIRATION_WINDOW = 1
 
     def __init__(self, evaluator_name: str = "old"):
-        evaluators = {"old": OldEvaluator, "new": NewEvaluator}
-        self.evaluator = evaluators[evaluator_name]()
+        self.evaluator = get_evaluator(evaluator_name)
         self.tt = TranspositionTable()
 
     def calculate_move(self, board: GameBoard, player: Player, time_per_move: int) -> int:
-        _, move = negamax(board, player, self.SEARCH_DEPTH,
-                          self.evaluator, tt=self.tt)
-        return move
+        deadline = Deadline(time.perf_counter() + (time_per_move - self.TIME_BUFFER_MS) / 1000.0)
+        # Fallback if not even the first iteration completes
+        best_move, best_score = board.get_valid_moves()[0], None
+        # Best move of the last completed iteration, searched first by the next one
+        pv_move = None
+        # Score of a win on this move; no deeper search finds a faster one
+        win_score = (GameBoard.MAX_MOVES - board.move_count) // 2
+
+        # Deepen one ply at a time; each iteration leaves its best moves in the
+        # table, where the next one picks them up to order its moves
+        max_depth = min(self.SEARCH_DEPTH, GameBoard.MAX_MOVES - board.move_count)
+        for depth in range(1, max_depth + 1):
+            if deadline.check():
+                break
+
+            # Aspiration window around the previous iteration's score
+            score, move = aspiration_search(board, player, depth, self.evaluator,
+                                            best_score, self.ASPIRATION_WINDOW,
+                                            deadline=deadline, tt=self.tt, pv_move=pv_move)
+            if move is None:  # Timeout, discard the unfinished iteration
+                break
+
+            best_move = pv_move = move
+            best_score = score
+
+            # Return early if we found a forced win
+            if score >= win_score:
+                break
+
+        return best_move
@@ -1,120 +1,58 @@
 from utils.engine import GameBoard
 
+_popcount = int.bit_count if hasattr(int, 'bit_count') else (lambda x: bin(x).count('1'))
 
-class BoardEvaluator:
-    # Pattern definitions: (player_positions, gap_position)
-    PATTERNS = [
-        ((1, 2, 3), 0),  # ' 111'
-        ((0, 1, 2), 3),  # '111 '
-        ((0, 2, 3), 1),  # '1 11'
-        ((0, 1, 3), 2),  # '11 1'
-    ]
-
-    def evaluate_board(self, board: GameBoard) -> int:
-        p1_board, p2_board = board.boards
-
-        # Precompute occupied positions (used multiple times, so cache it)
-        occupied = p1_board | p2_board
-
-        # Count threats for both players
-        p1_threats = self._count_threats(p1_board, occupied)
-        p2_threats = self._count_threats(p2_board, occupied)
-        return p1_threats - p2_threats
-
-    def _count_threats(self, player_board: int, occupied: int) -> int:
-        count = 0
-
-        # Column-major layout: bit_pos = col * 7 + row
-        # Check horizontal threats (rows 1-5, columns 0-3)
-        # We check 4 consecutive positions, so we can start from column 0-3
-        for row in range(1, 6):  # Skip row 0 (bottom) - threats there aren't useful
-            for col in range(4):  # Can fit 4 positions starting from col 0-3
-                base_pos = col * 7 + row  # Column-major: col * 7 + row
-                count += self._count_patterns_horizontal(
-                    player_board, occupied, base_pos
-                )
-
-        # Check diagonal down threats (\): top-left to bottom-right
-        # Need at least 3 rows and 4 columns to fit a diagonal pattern
-        for row in range(3):  # Can fit 4 positions starting from rows 0-2
-            for col in range(4):  # Can fit 4 positions starting from cols 0-3
-                base_pos = col * 7 + row  # Column-major: col * 7 + row
-                count += self._count_patterns_diagonal_down(
-                    player_board, occupied, base_pos
-                )
 
-        # Check diagonal up threats (/): top-right to bottom-left
-        # Need at least 3 rows, and columns must start from 3-6 (to fit pattern going left)
-        for row in range(3):  # Can fit 4 positions starting from rows 0-2
-            for col in range(3, 7):  # Can fit 4 positions starting from cols 3-6
-                base_pos = col * 7 + row  # Column-major: col * 7 + row
-                count += self._count_patterns_diagonal_up(
-                    player_board, occupied, base_pos
-                )
+def _start_bits(cols, rows) -> int:
+    """Bitmask of window start positions (column-major: bit_pos = col * 7 + row)."""
+    bits = 0
+    for col in cols:
+        for row in rows:
+            bits |= 1 << (col * 7 + row)
+    return bits
 
-        return count
 
-    def _count_patterns_horizontal(self, player_board: int, occupied: int, base_pos: int) -> int:
-        """Count patterns in horizontal direction (column-major: +7 per step)."""
-        count = 0
+# Windows of 4 cells as (step between cells, bitmask of window starts).
+# A threat is a window with 3 of the player's pieces and the 4th cell empty,
+# i.e. the patterns ' 111', '111 ', '1 11' and '11 1'.
+WINDOWS = [
+    # Horizontal, +7 per column (rows 1-5, skip row 0 - threats there aren't useful)
+    (7, _start_bits(range(4), range(1, 6))),
+    # Diagonal up-right, +8 (1 row + 1 column)
+    (8, _start_bits(range(4), range(3))),
+    # Diagonal up-left, +6 (1 row - 1 column); started from the lower-left cell
+    (6, _start_bits(range(4), range(3, 6))),
+]
 
-        for player_positions, gap_pos in self.PATTERNS:
-            # Build bitmask of all player piece positions for this pattern
-            # Horizontal: moving right = +7 (next column in column-major layout)
-            player_bits = 0
-            for pos_offset in player_positions:
-                player_bits |= 1 << (base_pos + pos_offset * 7)
 
-            # Get bit position of the gap
-            gap_bit = 1 << (base_pos + gap_pos * 7)
+def evaluate_board(p1_board: int, p2_board: int) -> int:
+    """Player 1's threats minus player 2's, straight from the two bitboards."""
+    # Precompute occupied positions (used multiple times, so cache it)
+    occupied = p1_board | p2_board
+    return count_threats(p1_board, occupied) - count_threats(p2_board, occupied)
 
-            # Check if pattern matches:
-            # 1. All player positions have pieces (player_board & player_bits == player_bits)
-            # 2. Gap position is empty (not in occupied)
-            if (player_board & player_bits) == player_bits and not (occupied & gap_bit):
-                count += 1
 
-        return count
+def count_threats(player_board: int, occupied: int) -> int:
+    """Count threats in every window at once: bit s of (board >> i*step) is cell i of the window at s."""
+    empty = ~occupied
+    count = 0
 
-    def _count_patterns_diagonal_down(self, player_board: int, occupied: int, base_pos: int) -> int:
-        """Count patterns in diagonal down direction (top-left to bottom-right).
-        Column-major: moving up-right = +8 (1 row + 1 column = +1 + 7).
-        """
-        count = 0
+    for step, starts in WINDOWS:
+        p1 = player_board >> step
+        p2 = player_board >> 2 * step
+        p3 = player_board >> 3 * step
+        # One term per gap position: the other three cells hold the player's pieces
+        count += _popcount(starts & empty & p1 & p2 & p3)
+        count += _popcount(starts & player_board & (empty >> step) & p2 & p3)
+        count += _popcount(starts & player_board & p1 & (empty >> 2 * step) & p3)
+        count += _popcount(starts & player_board & p1 & p2 & (empty >> 3 * step))
 
-        for player_positions, gap_pos in self.PATTERNS:
-            # Build bitmask: each step moves 8 bits (1 row + 1 column in column-major)
-            player_bits = 0
-            for pos_offset in player_positions:
-                player_bits |= 1 << (base_pos + pos_offset * 8)
+    return count
 
-            gap_bit = 1 << (base_pos + gap_pos * 8)
 
-            # Check if pattern matches
-            if (player_board & player_bits) == player_bits and not (occupied & gap_bit):
-                count += 1
-
-        return count
-
-    def _count_patterns_diagonal_up(self, player_board: int, occupied: int, base_pos: int) -> int:
-        """Count patterns in diagonal up direction (top-right to bottom-left).
-        Column-major: moving up-left = -6 (1 row - 1 column = +1 - 7 = -6).
-        Since we're checking from left to right, we need to check in reverse.
-        """
-        count = 0
-
-        for player_positions, gap_pos in self.PATTERNS:
-            # Build bitmask: each step moves -6 bits (1 row - 1 column in column-major)
-            # But we check from left to right, so we need to reverse the direction
-            # Actually, we check from col 3-6 going left, so we use -6
-            player_bits = 0
-            for pos_offset in player_positions:
-                player_bits |= 1 << (base_pos - pos_offset * 6)
-
-            gap_bit = 1 << (base_pos - gap_pos * 6)
-
-            # Check if pattern matches
-            if (player_board & player_bits) == player_bits and not (occupied & gap_bit):
-                count += 1
+class BoardEvaluator:
+    """GameBoard-facing wrapper around the module-level evaluate_board."""
 
-        return count
+    def evaluate_board(self, board: GameBoard) -> int:
+        p1_board, p2_board = board.boards
+        return evaluate_board(p1_board, p2_board)
@@ -1,120 +1,59 @@
 from utils.engine import GameBoard
 
+_popcount = int.bit_count if hasattr(int, 'bit_count') else (lambda x: bin(x).count('1'))
+
+
+def _window_masks() -> tuple:
+    """Build the bitmask of every 4-cell window threats are looked for in, once at import."""
+    # Each window is (base_pos, step): column-major layout, bit_pos = col * 7 + row
+    windows = []
+    # Horizontal threats (rows 1-5, columns 0-3): moving right = +7
+    # Skip row 0 (bottom) - threats there aren't useful
+    for row in range(1, 6):
+        for col in range(4):
+            windows.append((col * 7 + row, 7))
+    # Diagonal down threats (\): rows 0-2, cols 0-3, moving up-right = +8 (1 row + 1 column)
+    for row in range(3):
+        for col in range(4):
+            windows.append((col * 7 + row, 8))
+    # Diagonal up threats (/): rows 0-2, cols 3-6, moving up-left = -6 (1 row - 1 column)
+    for row in range(3):
+        for col in range(3, 7):
+            windows.append((col * 7 + row, -6))
+
+    masks = []
+    for base_pos, step in windows:
+        window = 0
+        for offset in range(4):
+            window |= 1 << (base_pos + offset * step)
+        masks.append(window)
+    return tuple(masks)
+
+
+# A threat is a window holding 3 of the player's pieces and one empty cell,
+# i.e. one of the patterns ' 111', '111 ', '1 11' or '11 1'
+WINDOW_MASKS = _window_masks()
+
+
+def evaluate_board(p1_board: int, p2_board: int) -> int:
+    """Player 1's threats minus player 2's, straight from the two bitboards."""
+    occupied = p1_board | p2_board
+
+    # One pass for both players: a threat window holds exactly 3 pieces, all of one player
+    score = 0
+    for window in WINDOW_MASKS:
+        pieces = occupied & window
+        if _popcount(pieces) == 3:
+            if p1_board & window == pieces:
+                score += 1
+            elif p2_board & window == pieces:
+                score -= 1
+    return score
+
 
 class BoardEvaluator:
-    # Pattern definitions: (player_positions, gap_position)
-    PATTERNS = [
-        ((1, 2, 3), 0),  # ' 111'
-        ((0, 1, 2), 3),  # '111 '
-        ((0, 2, 3), 1),  # '1 11'
-        ((0, 1, 3), 2),  # '11 1'
-    ]
+    """GameBoard-facing wrapper around the module-level evaluate_board."""
 
     def evaluate_board(self, board: GameBoard) -> int:
         p1_board, p2_board = board.boards
-
-        # Precompute occupied positions (used multiple times, so cache it)
-        occupied = p1_board | p2_board
-
-        # Count threats for both players
-        p1_threats = self._count_threats(p1_board, occupied)
-        p2_threats = self._count_threats(p2_board, occupied)
-        return p1_threats - p2_threats
-
-    def _count_threats(self, player_board: int, occupied: int) -> int:
-        count = 0
-
-        # Column-major layout: bit_pos = col * 7 + row
-        # Check horizontal threats (rows 1-5, columns 0-3)
-        # We check 4 consecutive positions, so we can start from column 0-3
-        for row in range(1, 6):  # Skip row 0 (bottom) - threats there aren't useful
-            for col in range(4):  # Can fit 4 positions starting from col 0-3
-                base_pos = col * 7 + row  # Column-major: col * 7 + row
-                count += self._count_patterns_horizontal(
-                    player_board, occupied, base_pos
-                )
-
-        # Check diagonal down threats (\): top-left to bottom-right
-        # Need at least 3 rows and 4 columns to fit a diagonal pattern
-        for row in range(3):  # Can fit 4 positions starting from rows 0-2
-            for col in range(4):  # Can fit 4 positions starting from cols 0-3
-                base_pos = col * 7 + row  # Column-major: col * 7 + row
-                count += self._count_patterns_diagonal_down(
-                    player_board, occupied, base_pos
-                )
-
-        # Check diagonal up threats (/): top-right to bottom-left
-        # Need at least 3 rows, and columns must start from 3-6 (to fit pattern going left)
-        for row in range(3):  # Can fit 4 positions starting from rows 0-2
-            for col in range(3, 7):  # Can fit 4 positions starting from cols 3-6
-                base_pos = col * 7 + row  # Column-major: col * 7 + row
-                count += self._count_patterns_diagonal_up(
-                    player_board, occupied, base_pos
-                )
-
-        return count
-
-    def _count_patterns_horizontal(self, player_board: int, occupied: int, base_pos: int) -> int:
-        """Count patterns in horizontal direction (column-major: +7 per step)."""
-        count = 0
-
-        for player_positions, gap_pos in self.PATTERNS:
-            # Build bitmask of all player piece positions for this pattern
-            # Horizontal: moving right = +7 (next column in column-major layout)
-            player_bits = 0
-            for pos_offset in player_positions:
-                player_bits |= 1 << (base_pos + pos_offset * 7)
-
-            # Get bit position of the gap
-            gap_bit = 1 << (base_pos + gap_pos * 7)
-
-            # Check if pattern matches:
-            # 1. All player positions have pieces (player_board & player_bits == player_bits)
-            # 2. Gap position is empty (not in occupied)
-            if (player_board & player_bits) == player_bits and not (occupied & gap_bit):
-                count += 1
-
-        return count
-
-    def _count_patterns_diagonal_down(self, player_board: int, occupied: int, base_pos: int) -> int:
-        """Count patterns in diagonal down direction (top-left to bottom-right).
-        Column-major: moving up-right = +8 (1 row + 1 column = +1 + 7).
-        """
-        count = 0
-
-        for player_positions, gap_pos in self.PATTERNS:
-            # Build bitmask: each step moves 8 bits (1 row + 1 column in column-major)
-            player_bits = 0
-            for pos_offset in player_positions:
-                player_bits |= 1 << (base_pos + pos_offset * 8)
-
-            gap_bit = 1 << (base_pos + gap_pos * 8)
-
-            # Check if pattern matches
-            if (player_board & player_bits) == player_bits and not (occupied & gap_bit):
-                count += 1
-
-        return count
-
-    def _count_patterns_diagonal_up(self, player_board: int, occupied: int, base_pos: int) -> int:
-        """Count patterns in diagonal up direction (top-right to bottom-left).
-        Column-major: moving up-left = -6 (1 row - 1 column = +1 - 7 = -6).
-        Since we're checking from left to right, we need to check in reverse.
-        """
-        count = 0
-
-        for player_positions, gap_pos in self.PATTERNS:
-            # Build bitmask: each step moves -6 bits (1 row - 1 column in column-major)
-            # But we check from left to right, so we need to reverse the direction
-            # Actually, we check from col 3-6 going left, so we use -6
-            player_bits = 0
-            for pos_offset in player_positions:
-                player_bits |= 1 << (base_pos - pos_offset * 6)
-
-            gap_bit = 1 << (base_pos - gap_pos * 6)
-
-            # Check if pattern matches
-            if (player_board & player_bits) == player_bits and not (occupied & gap_bit):
-                count += 1
-
-        return count
+        return evaluate_board(p1_board, p2_board)
@@ -0,0 +1,15 @@
+"""Shared board evaluator instances, looked up by name."""
+import importlib
+from functools import lru_cache
+
+# Evaluator name -> module defining its BoardEvaluator (imported on first use)
+EVALUATORS = {
+    "old": "Board_Evals.eval_old",
+    "new": "Board_Evals.eval_new",
+}
+
+
+@lru_cache(maxsize=None)
+def get_evaluator(name: str):
+    """Return the evaluator for name; evaluators are stateless, so bots share one instance."""
+    return importlib.import_module(EVALUATORS[name]).BoardEvaluator()
@@ -56,7 +56,7 @@ def run_game(time_limit_ms: int = 15, randomize_start: bool = False, verbose: bo
             print(f"{board}\n")
 
         # Check win
-        if board.check_win(current_player):
+        if board.last_move_won():
             if verbose:
                 print(f"🏆 {player_name} wins!")
             result = player_name
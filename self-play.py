@@ -1,26 +1,20 @@
 """Script to generate precomputed moves through self-play."""
-import os
 import sys
 import time
 from typing import Dict, Optional, Set, Tuple
 
 from tqdm import tqdm
 
-import utils.zobrist
 from Agents.ids import IterativeDeepeningBot
 from utils.engine import GameBoard, Player
-from utils.transposition_table import TranspositionTable
-from utils.zobrist import get_hasher
-
-# Reset to ensure fixed seed
-utils.zobrist._hasher = None
-hasher = get_hasher()
+from utils.save_positions import write_positions
+from utils.transposition_table import EXACT, TranspositionTable
 
 
 def play_self_play_game(agent, board: GameBoard, time_per_move: int,
                         visited_positions: Set[int]) -> Tuple[str, int]:
     """
-    Play a single self-play game and track visited positions.
+    Play a single self-play game from an empty board and track visited positions.
     Returns (result, num_moves).
     """
     board.reconstruct_from_moves([])
@@ -29,7 +23,7 @@ def play_self_play_game(agent, board: GameBoard, time_per_move: int,
 
     while move_count < GameBoard.MAX_MOVES:
         # Track position before move
-        position_hash = hasher.compute_hash(board)
+        position_hash = board.hash
         visited_positions.add(position_hash)
 
         # Get move from agent (populates TT with positions it explores)
@@ -40,10 +34,10 @@ def play_self_play_game(agent, board: GameBoard, time_per_move: int,
         move_count += 1
 
         # Track position after move
-        position_hash_after = hasher.compute_hash(board)
+        position_hash_after = board.hash
         visited_positions.add(position_hash_after)
 
-        if board.check_win(current_player):
+        if board.last_move_won():
             return "win", move_count
         if board.is_full():
             return "draw", move_count
@@ -72,13 +66,13 @@ def extract_positions_from_tt(tt: TranspositionTable, visited_positions: Set[int
     updated_count = 0
 
     for position_hash in visited_positions:
-        entry = tt.table.get(position_hash)
+        entry = tt.probe(position_hash)
         if entry is None:
             continue
 
-        score, depth, move = entry
+        score, depth, move, flag = entry
 
-        if depth >= min_depth and move is not None:
+        if depth >= min_depth and move is not None and flag == EXACT:
             existing = precomputed_moves.get(position_hash)
             if existing is None:
                 # New position
@@ -135,12 +129,11 @@ def generate_precomputed_moves_self_play(time_limit_seconds: float,
     agent = IterativeDeepeningBot(evaluator_name)
     tt = agent.tt  # Shared transposition table
 
-    # Pre-load existing moves into TT
-    for hash_val, (score, move, depth) in existing_moves.items():
-        tt.store(hash_val, score, depth, move)
+    # Existing moves need no pre-loading: the TT falls back to PRECOMPUTED_MOVES on a miss
 
-    hasher = get_hasher()
     visited_positions: Set[int] = set()
+    # One board for every game, play_self_play_game resets it
+    board = GameBoard()
 
     start_time = time.perf_counter()
     game_count = 0
@@ -172,7 +165,6 @@ def generate_precomputed_moves_self_play(time_limit_seconds: float,
     while time.perf_counter() - start_time < time_limit_seconds:
 
         # Play a game
-        board = GameBoard()
         _, moves = play_self_play_game(
             agent, board, current_time_per_move, visited_positions)
 
@@ -203,7 +195,7 @@ def generate_precomputed_moves_self_play(time_limit_seconds: float,
         if adaptive_time and len(recent_discoveries) >= DISCOVERY_WINDOW:
             # Analyze TT to see what depth we're actually reaching
             tt_depths = [entry[1]
-                         for entry in tt.table.values() if entry[1] is not None]
+                         for _, entry in tt.items() if entry[1] is not None]
             if tt_depths:
                 avg_tt_depth = sum(tt_depths) / len(tt_depths)
                 max_tt_depth = max(tt_depths)
@@ -219,7 +211,7 @@ def generate_precomputed_moves_self_play(time_limit_seconds: float,
                     current_min_depth = min(
                         current_min_depth + 1, max_tt_depth - 1, max_depth)
                     # Extract all positions from TT at new depth
-                    all_tt_positions = set(tt.table.keys())
+                    all_tt_positions = {hash_val for hash_val, _ in tt.items()}
                     extract_positions_from_tt(
                         tt, all_tt_positions, precomputed_moves, min_depth=current_min_depth)
                     pbar.set_description(
@@ -239,7 +231,7 @@ def generate_precomputed_moves_self_play(time_limit_seconds: float,
                     if new_time > current_time_per_move:
                         current_time_per_move = new_time
                         # Extract all positions from TT when time increases
-                        all_tt_positions = set(tt.table.keys())
+                        all_tt_positions = {hash_val for hash_val, _ in tt.items()}
                         extract_positions_from_tt(
                             tt, all_tt_positions, precomputed_moves, min_depth=current_min_depth)
                         pbar.set_description(
@@ -252,7 +244,7 @@ def generate_precomputed_moves_self_play(time_limit_seconds: float,
                 int((elapsed / time_limit_seconds) * (max_depth - min_depth))
             if target_min_depth > current_min_depth and current_min_depth < max_depth:
                 current_min_depth = min(target_min_depth, max_depth)
-                all_tt_positions = set(tt.table.keys())
+                all_tt_positions = {hash_val for hash_val, _ in tt.items()}
                 extract_positions_from_tt(
                     tt, all_tt_positions, precomputed_moves, min_depth=current_min_depth)
                 pbar.set_description(
@@ -272,7 +264,7 @@ def generate_precomputed_moves_self_play(time_limit_seconds: float,
 
     # Final pass: extract any remaining positions from TT that meet criteria
     print("\nPerforming final extraction from transposition table...")
-    all_tt_positions = set(tt.table.keys())
+    all_tt_positions = {hash_val for hash_val, _ in tt.items()}
     final_new = extract_positions_from_tt(tt, all_tt_positions, precomputed_moves,
                                           min_depth=current_min_depth)
     if final_new > 0:
@@ -291,7 +283,7 @@ def generate_precomputed_moves_self_play(time_limit_seconds: float,
     print(
         f"  New positions cached: {len(precomputed_moves) - len(existing_moves)}")
     print(f"  Total positions: {len(precomputed_moves)}")
-    print(f"  TT size: {len(tt.table)}")
+    print(f"  TT size: {len(tt)}")
     print(f"  Final minimum depth: {current_min_depth}")
     print(f"  Final time per move: {current_time_per_move}ms")
     print("=" * 70)
@@ -311,17 +303,7 @@ def load_existing_moves() -> Dict[int, Tuple[int, int, int]]:
 def write_precomputed_moves(precomputed_moves: Dict[int, Tuple[int, int, int]],
                             file_path: str = "Board_Evals/precomputed_moves.py") -> None:
     """Write precomputed moves with scores and depth to the file. Format: (score, move, depth)."""
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    full_path = os.path.join(script_dir, file_path)
-
-    with open(full_path, 'w') as f:
-        f.write(
-            '"""Precomputed moves: zobrist hashes mapped to (score, move, depth) tuples for board positions."""\n\n')
-        f.write('PRECOMPUTED_MOVES = {\n')
-        for hash_val, (score, move, depth) in sorted(precomputed_moves.items()):
-            f.write(f'    {hash_val}: ({score}, {move}, {depth}),\n')
-        f.write('}\n')
-
+    write_positions(precomputed_moves, file_path)
     print(f"\n✓ Written {len(precomputed_moves)} positions to {file_path}")
 
 
@@ -349,23 +331,7 @@ def save_positions_from_transposition_tables(transposition_tables: list,
 
     # Extract positions from all transposition tables
     for tt in transposition_tables:
-        for position_hash in visited_positions:
-            entry = tt.table.get(position_hash)
-            if entry is None:
-                continue
-
-            score, depth, move = entry
-
-            if depth >= min_depth and move is not None:
-                existing = precomputed_moves.get(position_hash)
-                if existing is None:
-                    # New position
-                    precomputed_moves[position_hash] = (score, move, depth)
-                else:
-                    # Position exists - update if new depth is greater
-                    existing_score, existing_move, existing_depth = existing
-                    if depth > existing_depth:
-                        precomputed_moves[position_hash] = (score, move, depth)
+        extract_positions_from_tt(tt, visited_positions, precomputed_moves, min_depth)
 
     # Save to file
     new_count = len(precomputed_moves) - len(existing_moves)
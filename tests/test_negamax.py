@@ -0,0 +1,90 @@
+"""Negamax against a brute-force solver on endgame positions, where it can be checked exhaustively."""
+import random
+import unittest
+
+from utils.engine import OPPONENT, GameBoard, Player
+from utils.negamax import aspiration_search, negamax
+from utils.transposition_table import TranspositionTable
+
+
+def solve(board: GameBoard, player: Player) -> int:
+    """Exact score for player to move: a win on the nth move of the game is worth (MAX_MOVES + 1 - n) // 2."""
+    moves = board.get_valid_moves()
+    if not moves:
+        return 0
+    best = -GameBoard.MAX_MOVES
+    for move in moves:
+        board.make_move(move, player)
+        if board.last_move_won():
+            score = (GameBoard.MAX_MOVES + 1 - board.move_count) // 2
+        else:
+            score = -solve(board, OPPONENT[player])
+        board.undo_move(move)
+        best = max(best, score)
+    return best
+
+
+def endgame_positions(move_counts, count: int, seed: int = 0):
+    """Random undecided positions with move_counts moves played, as (moves, player to move)."""
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        board = GameBoard()
+        player = Player.PLAYER1
+        moves = []
+        target = rng.choice(move_counts)
+        while len(moves) < target:
+            move = rng.choice(board.get_valid_moves())
+            board.make_move(move, player)
+            moves.append(move)
+            if board.last_move_won():
+                break
+            player = OPPONENT[player]
+        else:
+            positions.append((moves, player))
+    return positions
+
+
+class NegamaxEndgameTest(unittest.TestCase):
+    POSITIONS = endgame_positions(range(38, 42), 300)
+
+    def setUp(self):
+        self.board = GameBoard()
+
+    def test_full_window_is_exact(self):
+        for moves, player in self.POSITIONS:
+            self.board.reconstruct_from_moves(moves)
+            expected = solve(self.board, player)
+            score, move = negamax(self.board, player, GameBoard.MAX_MOVES - len(moves), None,
+                                  tt=TranspositionTable(10))
+            self.assertEqual(score, expected, moves)
+            self.assertIsNotNone(move)
+
+    def test_narrow_windows_bound_the_score(self):
+        # Fail-soft: a score outside the window is still a bound on the true value
+        for moves, player in self.POSITIONS:
+            self.board.reconstruct_from_moves(moves)
+            expected = solve(self.board, player)
+            for alpha in range(-2, 2):
+                for beta in (alpha + 1, alpha + 2):
+                    score, _ = negamax(self.board, player, GameBoard.MAX_MOVES - len(moves), None,
+                                       alpha, beta, tt=TranspositionTable(10))
+                    if score <= alpha:
+                        self.assertLessEqual(expected, score, (moves, alpha, beta))
+                    elif score >= beta:
+                        self.assertGreaterEqual(expected, score, (moves, alpha, beta))
+                    else:
+                        self.assertEqual(expected, score, (moves, alpha, beta))
+
+    def test_aspiration_deepening_ends_on_the_exact_score(self):
+        for moves, player in self.POSITIONS:
+            self.board.reconstruct_from_moves(moves)
+            expected = solve(self.board, player)
+            tt, score = TranspositionTable(10), None
+            for depth in range(1, GameBoard.MAX_MOVES - len(moves) + 1):
+                score, _ = aspiration_search(self.board, player, depth, None, score, 1, tt=tt)
+            self.assertEqual(score, expected, moves)
+
+
+if __name__ == "__main__":
+    unittest.main()
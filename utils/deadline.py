@@ -0,0 +1,26 @@
+"""Search deadline that only reads the clock every few nodes."""
+import time
+
+
+class Deadline:
+    # Nodes between clock reads (power of two); well under a millisecond of search
+    CHECK_INTERVAL = 8
+
+    def __init__(self, end_time: float, check_interval: int = CHECK_INTERVAL):
+        self.end_time = end_time
+        self.check_mask = check_interval - 1
+        self.nodes = 0
+        self.expired = False
+
+    def tick(self) -> bool:
+        """Count a searched node; return True once the deadline has passed."""
+        self.nodes += 1
+        if not self.nodes & self.check_mask and time.perf_counter() >= self.end_time:
+            self.expired = True
+        return self.expired
+
+    def check(self) -> bool:
+        """Read the clock now; return True once the deadline has passed."""
+        if not self.expired and time.perf_counter() >= self.end_time:
+            self.expired = True
+        return self.expired
@@ -1,7 +1,8 @@
+import os
 import struct
 import sys
 from enum import IntEnum
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 
 class Player(IntEnum):
@@ -9,10 +10,33 @@ class Player(IntEnum):
     PLAYER2 = 2  # ('O')
 
 
+# Opponent indexed by player value: no enum attribute lookups or branch on hot paths
+OPPONENT = (None, Player.PLAYER2, Player.PLAYER1)
+
+# Wire formats: message header (type, total length), time per move, and our move reply
+_HEADER = struct.Struct('<BH')
+_TIME_PER_MOVE = struct.Struct('<I')
+_MOVE_REPLY = struct.Struct('<BHB')
+_STDOUT_FD = 1
+
+# Byte the game start message uses for "you are player 1"
+_PLAYER1_BYTE = ord('1')
+
+# Columns in center-first search order
+CENTER_ORDER = (3, 2, 4, 1, 5, 0, 6)
+
+
 class GameBoard:
     HEIGHT = 6
     WIDTH = 7
     MAX_MOVES = HEIGHT * WIDTH
+    # Bottom cell of every column, and every playable cell (no sentinel row)
+    BOTTOM_MASK = int(('0' * HEIGHT + '1') * WIDTH, 2)
+    BOARD_MASK = BOTTOM_MASK * ((1 << HEIGHT) - 1)
+    TOP_MASK = BOTTOM_MASK << (HEIGHT - 1)
+
+    __slots__ = ('move_count', 'position', 'mask', '_current_player_in_position',
+                 'last_move', 'hash', '_move_keys', '_threats', '_threat_history')
 
     def __init__(self):
         self.move_count = 0
@@ -20,8 +44,11 @@ class GameBoard:
         self.mask = 0      # All occupied cells
         self._current_player_in_position = Player.PLAYER1
         self.last_move: Optional[int] = None  # Last column played
-        # Valid moves in center-first order: [3, 2, 4, 1, 5, 0, 6]
-        self._valid_moves = [3, 2, 4, 1, 5, 0, 6]
+        self.hash = 0  # Zobrist hash of the position, kept current by make_move/undo_move
+        self._move_keys = _zobrist_move_keys()
+        # Cells completing 4 in a row, indexed by player, and their values before each move
+        self._threats = [0, 0, 0]
+        self._threat_history: List[int] = []
 
     @staticmethod
     def _top_mask(col: int) -> int:
@@ -31,12 +58,37 @@ class GameBoard:
     def _bottom_mask(col: int) -> int:
         return 1 << col * (GameBoard.HEIGHT + 1)
 
+    @staticmethod
+    def _column_mask(col: int) -> int:
+        return ((1 << GameBoard.HEIGHT) - 1) << col * (GameBoard.HEIGHT + 1)
+
+    @staticmethod
+    def _has_alignment(board: int) -> bool:
+        """Return True if the bitboard contains 4 aligned pieces."""
+        # Check diagonals first (most common wins)
+        m = board & (board >> 6)
+        if m & (m >> 12):
+            return True
+
+        m = board & (board >> 8)
+        if m & (m >> 16):
+            return True
+
+        # Check horizontal
+        m = board & (board >> 7)
+        if m & (m >> 14):
+            return True
+
+        # Check vertical (least common)
+        m = board & (board >> 1)
+        return bool(m & (m >> 2))
+
     def can_play(self, col: int) -> bool:
-        return not (self.mask & self._top_mask(col))
+        return not (self.mask & _TOP_CELLS[col])
 
-    def get_valid_moves(self) -> List[int]:
-        """Return cached valid moves in center-first order."""
-        return self._valid_moves
+    def get_valid_moves(self) -> Tuple[int, ...]:
+        """Return the non-full columns in center-first order (a shared tuple, don't modify)."""
+        return _VALID_MOVES[self.mask & self.TOP_MASK]
 
     @property
     def boards(self):
@@ -48,35 +100,30 @@ class GameBoard:
 
     def __str__(self) -> str:
         """Return human-readable board representation."""
-        p1_board, p2_board = self.boards
-        result = []
-
-        for row in range(self.HEIGHT - 1, -1, -1):
-            line = ["|"]
-            for col in range(self.WIDTH):
-                pos = col * (self.HEIGHT + 1) + row
-                bit = 1 << pos
-                if p1_board & bit:
-                    line.append(" X")
-                elif p2_board & bit:
-                    line.append(" O")
-                else:
-                    line.append(" .")
-            line.append(" |")
-            result.append("".join(line))
-
+        # One cell string per bit position; only the occupied cells are visited
+        cells = [" ."] * (self.WIDTH * (self.HEIGHT + 1))
+        for pieces, symbol in zip(self.boards, (" X", " O")):
+            while pieces:
+                low_bit = pieces & -pieces
+                cells[low_bit.bit_length() - 1] = symbol
+                pieces ^= low_bit
+
+        # Column-major: a row's cells are HEIGHT + 1 apart
+        result = ["|" + "".join(cells[row::self.HEIGHT + 1]) + " |"
+                  for row in range(self.HEIGHT - 1, -1, -1)]
         result.append("|---------------|")
         result.append("  0 1 2 3 4 5 6")
         return "\n".join(result)
 
     def make_move(self, column: int, player: Player) -> bool:
-        if not self.can_play(column):
+        mask = self.mask
+        if mask & _TOP_CELLS[column]:
             return False
 
-        # Update mask to add piece at correct height
-        new_mask = self.mask | (self.mask + self._bottom_mask(column))
-        new_bit = new_mask & ~self.mask
-        self.mask = new_mask
+        # Adding the column's bottom cell carries up to the first empty cell of the column
+        new_bit = (mask + _BOTTOM_CELLS[column]) & COLUMN_CELLS[column]
+        self.mask = mask | new_bit
+        self.hash ^= self._move_keys[player][new_bit.bit_length() - 1]
 
         # If different player, switch position first
         if self.move_count > 0 and self._current_player_in_position != player:
@@ -84,14 +131,15 @@ class GameBoard:
         # Add new piece to current player's position
         self.position |= new_bit
 
+        # Only the mover's threats change (filled cells are masked out by winning_cells)
+        threats = self._threats
+        self._threat_history.append(threats[player])
+        threats[player] = self._threat_cells(self.position)
+
         self._current_player_in_position = player
         self.move_count += 1
         self.last_move = column
 
-        # If column is now full, remove it from valid moves
-        if not self.can_play(column) and column in self._valid_moves:
-            self._valid_moves.remove(column)
-
         return True
 
     def undo_move(self, column: Optional[int] = None) -> None:
@@ -99,28 +147,29 @@ class GameBoard:
         self.last_move = None
 
         # Find and remove the highest set bit in this column
-        col_base = column * (self.HEIGHT + 1)
-        col_mask = self.mask & ((1 << (self.HEIGHT + 1)) - 1) << col_base
+        col_mask = self.mask & COLUMN_CELLS[column]
         if col_mask:
+            self.hash ^= self._move_keys[self._current_player_in_position][col_mask.bit_length() - 1]
             highest_bit = 1 << (col_mask.bit_length() - 1)
             self.mask &= ~highest_bit
             self.position &= ~highest_bit
 
+        self._threats[self._current_player_in_position] = self._threat_history.pop()
+
         # Switch players back
         self.position ^= self.mask
-        self._current_player_in_position = Player.PLAYER2 if self._current_player_in_position == Player.PLAYER1 else Player.PLAYER1
-
-        # If column is now available, add it back to valid moves in center-first order
-        if column is not None and self.can_play(column) and column not in self._valid_moves:
-            CENTER_FIRST = [3, 2, 4, 1, 5, 0, 6]
-            column_index = CENTER_FIRST.index(column)
-            # Insert before the first move that comes after this column in center-first order
-            for i, move in enumerate(self._valid_moves):
-                if CENTER_FIRST.index(move) > column_index:
-                    self._valid_moves.insert(i, column)
-                    return
-            # If no later move found, append to end
-            self._valid_moves.append(column)
+        self._current_player_in_position = OPPONENT[self._current_player_in_position]
+
+    def is_mirror_symmetric(self) -> bool:
+        """Return True if the position is unchanged by reversing the column order."""
+        column_bits = (1 << (self.HEIGHT + 1)) - 1
+        for col in range(self.WIDTH // 2):
+            left = col * (self.HEIGHT + 1)
+            right = (self.WIDTH - 1 - col) * (self.HEIGHT + 1)
+            for board in (self.mask, self.position):
+                if (board >> left) & column_bits != (board >> right) & column_bits:
+                    return False
+        return True
 
     def is_full(self) -> bool:
         return self.move_count >= self.MAX_MOVES
@@ -130,26 +179,40 @@ class GameBoard:
         if self.move_count < 7:
             return False
 
-        p1_board, p2_board = self.boards
-        board = p1_board if player == Player.PLAYER1 else p2_board
+        # position holds the pieces of whoever moved last; the other player owns the rest
+        board = self.position
+        if self._current_player_in_position != player:
+            board ^= self.mask
+        return self._has_alignment(board)
 
-        # Check diagonals first (most common wins)
-        m = board & (board >> 6)
-        if m & (m >> 12):
-            return True
+    def last_move_won(self) -> bool:
+        """Return True if the player who just moved completed 4 in a row."""
+        return self.move_count >= 7 and self._has_alignment(self.position)
 
-        m = board & (board >> 8)
-        if m & (m >> 16):
-            return True
+    def playable_cells(self) -> int:
+        """Bitmask of the cell each non-full column would be played into."""
+        return (self.mask + self.BOTTOM_MASK) & self.BOARD_MASK
 
-        # Check horizontal
-        m = board & (board >> 7)
-        if m & (m >> 14):
-            return True
+    def winning_cells(self, player: Player) -> int:
+        """Bitmask of empty cells that would complete 4 in a row for player (playable or not)."""
+        return self._threats[player] & (self.BOARD_MASK ^ self.mask)
 
-        # Check vertical (least common)
-        m = board & (board >> 1)
-        return bool(m & (m >> 2))
+    @staticmethod
+    def _threat_cells(pieces: int) -> int:
+        """Bitmask of cells (empty or not) that would complete 4 in a row with pieces."""
+        # Vertical: only the cell on top of 3 pieces
+        cells = (pieces << 1) & (pieces << 2) & (pieces << 3)
+
+        # Horizontal (7) and both diagonals (6, 8): the gap can be any of the 4 cells
+        for shift in (GameBoard.HEIGHT + 1, GameBoard.HEIGHT, GameBoard.HEIGHT + 2):
+            pair = (pieces << shift) & (pieces << 2 * shift)
+            cells |= pair & (pieces << 3 * shift)
+            cells |= pair & (pieces >> shift)
+            pair = (pieces >> shift) & (pieces >> 2 * shift)
+            cells |= pair & (pieces << shift)
+            cells |= pair & (pieces >> 3 * shift)
+
+        return cells
 
     def reconstruct_from_moves(self, moves: List[int]) -> None:
         """Reset board and apply moves from the list."""
@@ -158,11 +221,47 @@ class GameBoard:
         self.move_count = 0
         self._current_player_in_position = Player.PLAYER1
         self.last_move = None
-        self._valid_moves = [3, 2, 4, 1, 5, 0, 6]
+        self.hash = 0
+        self._threats = [0, 0, 0]
+        self._threat_history.clear()
 
+        # Player 1 makes the even-numbered moves
+        players = (Player.PLAYER1, Player.PLAYER2)
+        make = self.make_move
         for i, col in enumerate(moves):
-            self.make_move(col, Player.PLAYER1 if i %
-                           2 == 0 else Player.PLAYER2)
+            make(col, players[i & 1])
+
+
+def _zobrist_move_keys():
+    """Zobrist keys for playing a move, see ZobristHasher.move_keys."""
+    # Imported here because utils.zobrist imports this module
+    from utils.zobrist import get_hasher
+    return get_hasher().move_keys
+
+
+# Per-column cells, indexed by column: bottom cell, top cell, and all playable cells
+# (COLUMN_CELLS also picks a column's bit out of a row-wide bitmask, e.g. playable_cells())
+_BOTTOM_CELLS = tuple(GameBoard._bottom_mask(col) for col in range(GameBoard.WIDTH))
+_TOP_CELLS = tuple(GameBoard._top_mask(col) for col in range(GameBoard.WIDTH))
+COLUMN_CELLS = tuple(GameBoard._column_mask(col) for col in range(GameBoard.WIDTH))
+
+
+def _valid_moves_table() -> Dict[int, Tuple[int, ...]]:
+    """Map each combination of full columns (mask & TOP_MASK) to the playable columns, center first."""
+    table = {}
+    for full_columns in range(1 << GameBoard.WIDTH):
+        top_cells = 0
+        for col in range(GameBoard.WIDTH):
+            if full_columns >> col & 1:
+                top_cells |= GameBoard._top_mask(col)
+        table[top_cells] = tuple(col for col in CENTER_ORDER if not full_columns >> col & 1)
+    return table
+
+
+_VALID_MOVES = _valid_moves_table()
+
+# The complete reply message for each column; only the column byte ever differs
+_MOVE_REPLIES = tuple(_MOVE_REPLY.pack(1, 4, col) for col in range(GameBoard.WIDTH))
 
 
 class SimpleEngine:
@@ -176,6 +275,8 @@ class SimpleEngine:
     The engine responds by sending the chosen move as a binary message.
     """
 
+    __slots__ = ('board', 'my_player', 'time_per_move', 'agent')
+
     def __init__(self, agent_class_name: str, evaluator_name: str = "old"):
         """
         Initialize the game engine with an AI agent.
@@ -202,14 +303,13 @@ class SimpleEngine:
 
     def _send_move(self, column: int) -> None:
         """Send a move response via binary protocol to stdout."""
-        sys.stdout.buffer.write(struct.pack('<BHB', 1, 4, column))
-        sys.stdout.buffer.flush()
+        # One unbuffered write, nothing else goes to stdout while the engine runs
+        os.write(_STDOUT_FD, _MOVE_REPLIES[column])
 
-    def _handle_game_start(self, data: bytes) -> None:
+    def _handle_game_start(self, data: memoryview) -> None:
         """Handle game start message (message type 0)."""
-        self.my_player = Player.PLAYER1 if data[3] == ord(
-            '1') else Player.PLAYER2
-        self.time_per_move = struct.unpack('<I', data[4:8])[0]
+        self.my_player = Player.PLAYER1 if data[3] == _PLAYER1_BYTE else Player.PLAYER2
+        self.time_per_move = _TIME_PER_MOVE.unpack_from(data, 4)[0]
 
         num_moves = data[8]
         moves = list(data[9:9+num_moves]) if num_moves > 0 else []
@@ -218,10 +318,9 @@ class SimpleEngine:
         if self.my_player == Player.PLAYER1:
             self._make_and_send_move()
 
-    def _handle_make_move(self, data: bytes) -> None:
+    def _handle_make_move(self, data: memoryview) -> None:
         """Handle opponent move notification (message type 1)."""
-        opponent = Player.PLAYER2 if self.my_player == Player.PLAYER1 else Player.PLAYER1
-        self.board.make_move(data[3], opponent)
+        self.board.make_move(data[3], OPPONENT[self.my_player])
         self._make_and_send_move()
 
     def _make_and_send_move(self) -> None:
@@ -234,20 +333,27 @@ class SimpleEngine:
 
     def run(self) -> None:
         """Main engine loop that processes incoming messages."""
-        handlers = {0: self._handle_game_start, 1: self._handle_make_move}
+        # Every message is read into the same buffer (the length field is 16 bits, so one
+        # always fits) and handed to its handler as a view, without copying it out
+        stdin = sys.stdin.buffer
+        message = memoryview(bytearray(1 << 16))
+        header = message[:3]
 
         try:
             while True:
-                header = sys.stdin.buffer.read(3)
-                if len(header) < 3:
+                if stdin.readinto(header) < 3:
                     break
 
-                msg_type, msg_length = struct.unpack('<BH', header)
-                body = sys.stdin.buffer.read(msg_length - 3)
-                if len(body) < (msg_length - 3) or msg_type not in handlers:
+                msg_type, msg_length = _HEADER.unpack_from(header)
+                if msg_length < 3 or stdin.readinto(message[3:msg_length]) < msg_length - 3:
                     break
 
-                handlers[msg_type](header + body)
+                if msg_type == 1:  # Most messages are the opponent's moves
+                    self._handle_make_move(message[:msg_length])
+                elif msg_type == 0:
+                    self._handle_game_start(message[:msg_length])
+                else:
+                    break
         except (KeyboardInterrupt, Exception):
             sys.exit(1)
 
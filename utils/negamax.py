@@ -1,98 +1,238 @@
-import time
-from typing import Optional, Tuple
+from typing import Optional, Sequence, Tuple
 
-from utils.engine import GameBoard, Player
-from utils.transposition_table import TranspositionTable
-from utils.zobrist import get_hasher
+from utils.deadline import Deadline
+from utils.engine import COLUMN_CELLS, OPPONENT, GameBoard, Player
+from utils.transposition_table import EXACT, LOWER, UPPER, TranspositionTable
+from utils.zobrist import ZobristHasher, get_hasher
+
+
+# Bound larger than any score; scores are integers in [-MAX_MOVES // 2, MAX_MOVES // 2]
+INF = 10**9
 
 
 def negamax(board: GameBoard, player: Player, depth: int, evaluator,
-            alpha: float = float('-inf'), beta: float = float('inf'),
-            deadline: Optional[float] = None,
+            alpha: int = -INF, beta: int = INF,
+            deadline: Optional[Deadline] = None,
             ply: int = 0,
             tt: Optional[TranspositionTable] = None,
-            hash_value: Optional[int] = None) -> Tuple[int, Optional[int]]:
+            hash_value: Optional[int] = None,
+            pv_move: Optional[int] = None) -> Tuple[int, Optional[int]]:
+    """Search board to depth for player; best_move is None if the deadline expired.
+
+    pv_move (the best move of a previous, shallower search) is tried first at the root.
+    """
     if tt is None:
         tt = TranspositionTable()
     hasher = get_hasher()
 
     if hash_value is None:
-        hash_value = hasher.compute_hash(board)
+        hash_value = board.hash
+
+    # A mirrored move has the same value, so a symmetric root only needs one half
+    root_moves = None
+    if board.is_mirror_symmetric():
+        root_moves = [move for move in board.get_valid_moves() if move <= GameBoard.WIDTH // 2]
+
+    return _search(board, player, depth, alpha, beta, deadline, tt, hasher, hash_value,
+                   root_moves, pv_move)
+
+
+def aspiration_search(board: GameBoard, player: Player, depth: int, evaluator,
+                      guess: Optional[int], window: int,
+                      deadline: Optional[Deadline] = None,
+                      tt: Optional[TranspositionTable] = None,
+                      pv_move: Optional[int] = None) -> Tuple[int, Optional[int]]:
+    """negamax in a window of +/-window around guess (e.g. the previous iteration's score).
+
+    A search that fails outside the window is repeated with that side opened up to the
+    score bounds; without a guess the full bounds are searched.
+    """
+    # A win on this move scores remaining // 2, a loss on the opponent's reply
+    # -(remaining - 1) // 2 (widened by one for safety)
+    remaining_moves = GameBoard.MAX_MOVES - board.move_count
+    lower, upper = -(remaining_moves // 2) - 1, remaining_moves // 2 + 1
+
+    alpha, beta = lower, upper
+    if guess is not None:
+        alpha = max(alpha, guess - window)
+        beta = min(beta, guess + window)
+
+    while True:
+        score, move = negamax(board, player, depth, evaluator, alpha, beta,
+                              deadline=deadline, tt=tt, pv_move=pv_move)
+        if move is None:  # Timeout
+            return score, move
+        if score <= alpha and alpha > lower:
+            alpha = lower
+        elif score >= beta and beta < upper:
+            beta = upper
+        else:
+            return score, move
+
+
+def _search(board: GameBoard, player: Player, depth: int, alpha: int, beta: int,
+            deadline: Optional[Deadline], tt: TranspositionTable, hasher: ZobristHasher,
+            hash_value: int, moves: Optional[Sequence[int]] = None,
+            pv_move: Optional[int] = None) -> Tuple[int, Optional[int]]:
+    """Recursive part of negamax, with defaults already resolved and no unused arguments."""
+    # Out of time: unwind without storing anything, callers discard the result
+    if deadline is not None and deadline.tick():
+        return (0, None)
 
     # Check transposition table
     tt_result = tt.get(hash_value, depth, alpha, beta)
     if tt_result is not None:
         return tt_result
 
-    # Get valid moves
-    moves = board.get_valid_moves()
+    # Get valid moves, unless the caller narrowed them down
+    if moves is None:
+        moves = board.get_valid_moves()
     if not moves:  # Draw
         return (0, None)
 
     if depth == 0: # Non-Terminal Leaf
         return (0, None)
 
-    opponent = Player.PLAYER2 if player == Player.PLAYER1 else Player.PLAYER1
-
-    max_score_when_not_winning = (GameBoard.MAX_MOVES - 1 - board.move_count) // 2
+    opponent = OPPONENT[player]
+    move_count = board.move_count
+    max_score_when_not_winning = (GameBoard.MAX_MOVES - 1 - move_count) // 2
+
+    # Win right away if we can; this has to come before the bounds below, which assume we can't
+    playable = board.playable_cells()
+    winning = board.winning_cells(player) & playable
+    if winning:
+        for move in moves:
+            if winning & COLUMN_CELLS[move]:
+                # Win score = (MAX_MOVES + 1 - nbMoves()) / 2, counting this move
+                score = (GameBoard.MAX_MOVES - move_count) // 2
+                tt.store(hash_value, score, depth, move)
+                return score, move
+
+    # Keep only moves that don't hand the opponent a win on their next move: a threat of theirs
+    # we can play into must be blocked, and we must not fill the cell under one of their threats
+    opponent_winning = board.winning_cells(opponent)
+    forced = opponent_winning & playable
+    non_losing = playable & ~(opponent_winning >> 1)
+    if forced:
+        non_losing &= forced
+    if not non_losing or forced & (forced - 1):
+        # Two threats can't both be blocked: the opponent wins on their next move
+        score = -max_score_when_not_winning
+        tt.store(hash_value, score, depth, moves[0])
+        return score, moves[0]
+    if non_losing != playable:
+        # (On a mirror-symmetric root the threats are symmetric too, so its half keeps a move)
+        moves = [move for move in moves if non_losing & COLUMN_CELLS[move]]
+
+    # Neither side wins in the next two plies. If those fill the board, it is a draw;
+    # otherwise the earliest loss is three plies away, which bounds the score from below
+    if move_count >= GameBoard.MAX_MOVES - 2:
+        return 0, moves[0]
+    min_score = -((GameBoard.MAX_MOVES - 3 - move_count) // 2)
+    if alpha < min_score:
+        alpha = min_score
+        if alpha >= beta:
+            # Empty window - return first move with bound score
+            return alpha, moves[0]
     if beta > max_score_when_not_winning:
         beta = max_score_when_not_winning
         if alpha >= beta:
-            # Empty window - return first move with bound score
-            return beta, moves[0] if moves else None
-
-    # Order moves by transposition table scores for better pruning
+            return beta, moves[0]
+    alpha_orig = alpha
+
+    if depth == 1:
+        return _search_leaves(player, alpha, beta, tt, hasher, hash_value,
+                              moves, playable, max_score_when_not_winning)
+
+    # Bind hot methods once; the loops below then use fast local loads
+    make, undo = board.make_move, board.undo_move
+    get_score, store = tt.get_score, tt.store
+    move_keys = hasher.move_keys[player]
+
+    # Order moves by transposition table scores for better pruning. The sort key packs
+    # (child score, center-first index) into one int so a plain sort needs no key function;
+    # the caller's PV move, or else the best move stored for this position (even from a
+    # shallower search), goes first
+    tt_move = pv_move if pv_move is not None else tt.get_best_move(hash_value)
     move_data = []
-    for move in moves:
-        row = _get_row_after_move(board, move)
-        move_hash = hasher.update_hash(hash_value, move, row, player)
-        opponent_score = tt.get_score(move_hash)
-        move_data.append((move, move_hash,
-                         opponent_score if opponent_score is not None else max_score_when_not_winning))
-    move_data.sort(key=lambda x: x[2])
+    for index, move in enumerate(moves):
+        # The child's hash: the move's key at the cell it lands in
+        move_hash = hash_value ^ move_keys[(playable & COLUMN_CELLS[move]).bit_length() - 1]
+        if move == tt_move:
+            order = -INF
+        else:
+            opponent_score = get_score(move_hash)
+            if opponent_score is None:
+                opponent_score = max_score_when_not_winning
+            order = opponent_score * GameBoard.WIDTH + index
+        move_data.append((order, move, move_hash))
+    move_data.sort()
 
     # Initialize with worst score and first move (ensure we always return a move)
-    best_score, best_move = -max_score_when_not_winning, move_data[0][0]
+    best_score, best_move = -max_score_when_not_winning, move_data[0][1]
+    first_child = True
+
+    for _, move, move_hash in move_data:
+        make(move, player)
+
+        # Principal variation search: full window for the first (best-ordered)
+        # move, zero-window scouts for the rest, re-searching only on fail-high
+        if first_child:
+            first_child = False
+            score_result = _search(board, opponent, depth - 1, -beta, -alpha,
+                                   deadline, tt, hasher, move_hash)
+        else:
+            score_result = _search(board, opponent, depth - 1, -alpha - 1, -alpha,
+                                   deadline, tt, hasher, move_hash)
+            if alpha < -score_result[0] < beta:
+                score_result = _search(board, opponent, depth - 1, -beta, -alpha,
+                                       deadline, tt, hasher, move_hash)
+        score = -score_result[0]
+        undo(move)
 
-    for move, move_hash, _ in move_data:
-        # Check deadline before recursive call
-        if deadline and time.perf_counter() >= deadline:
-            return best_score, best_move
+        # The child ran out of time, so its score is meaningless
+        if deadline is not None and deadline.expired:
+            return (0, None)
 
-        board.make_move(move, player)
+        # Update best move
+        if score > best_score:
+            best_score, best_move = score, move
 
-        # Check for immediate win
-        if board.check_win(player):
-            # Win score = (MAX_MOVES + 1 - nbMoves()) / 2
-            score = (GameBoard.MAX_MOVES + 1 - board.move_count) // 2
-            board.undo_move(move)
-            tt.store(hash_value, score, depth, move)
-            return score, move
+        alpha = max(alpha, score)
+        if alpha >= beta:
+            store(hash_value, score, depth, best_move, LOWER)
+            return (score, best_move)
 
-        # Recursive search
-        score_result = negamax(board, opponent, depth - 1, evaluator,
-                               -beta, -alpha, deadline, ply + 1, tt, move_hash)
-        score = -score_result[0]
-        board.undo_move(move)
+    flag = UPPER if best_score <= alpha_orig else EXACT
+    store(hash_value, best_score, depth, best_move, flag)
+    return best_score, best_move
 
-        # Handle timeout from recursive call
-        if score_result[1] is None and deadline and time.perf_counter() >= deadline:
-            continue
 
-        # Update best move
+def _search_leaves(player: Player, alpha: int, beta: int,
+                   tt: TranspositionTable, hasher: ZobristHasher, hash_value: int,
+                   moves: Sequence[int], playable: int, max_score_when_not_winning: int) -> Tuple[int, Optional[int]]:
+    """Depth-1 search: the children are depth-0 leaves, scored from the table without making the moves.
+
+    The caller has already handled immediate wins and dropped moves that lose at once.
+    """
+    # A leaf is worth what the table knows about it, or 0 (non-terminal) otherwise
+    get, move_keys = tt.get, hasher.move_keys[player]
+    alpha_orig = alpha
+    best_score, best_move = -max_score_when_not_winning, moves[0]
+    for move in moves:
+        leaf_hash = hash_value ^ move_keys[(playable & COLUMN_CELLS[move]).bit_length() - 1]
+        leaf = get(leaf_hash, 0, -beta, -alpha)
+        score = 0 if leaf is None else -leaf[0]
+
         if score > best_score:
             best_score, best_move = score, move
 
         alpha = max(alpha, score)
         if alpha >= beta:
-            tt.store(hash_value, score, depth, best_move)
+            tt.store(hash_value, score, 1, best_move, LOWER)
             return (score, best_move)
 
-    tt.store(hash_value, best_score, depth, best_move)
+    flag = UPPER if best_score <= alpha_orig else EXACT
+    tt.store(hash_value, best_score, 1, best_move, flag)
     return best_score, best_move
 
-
-def _get_row_after_move(board: GameBoard, col: int) -> int:
-    col_base = col * (GameBoard.HEIGHT + 1)
-    col_mask = board.mask & (((1 << (GameBoard.HEIGHT + 1)) - 1) << col_base)
-    return col_mask.bit_count() if hasattr(int, 'bit_count') else bin(col_mask).count('1')
@@ -3,33 +3,42 @@ import os
 from typing import Dict, Tuple
 
 from Board_Evals.precomputed_moves import PRECOMPUTED_MOVES
-from utils.transposition_table import TranspositionTable
+from utils.transposition_table import EXACT, TranspositionTable
 
 
-def save_positions(*transposition_tables: TranspositionTable,
-                   file_path: str = "Board_Evals/precomputed_moves.py") -> int:
-    """Save all positions from transposition tables to file. Returns number of new positions."""
-    # Merge all positions from all tables
-    all_positions: Dict[int, Tuple[int, int, int]] = dict(PRECOMPUTED_MOVES)
+PositionTable = Dict[int, Tuple[int, int, int]]
 
-    for tt in transposition_tables:
-        for hash_val, (score, depth, move) in tt.table.items():
-            if move is not None:
-                existing = all_positions.get(hash_val)
-                if existing is None or depth > existing[2]:
-                    all_positions[hash_val] = (score, move, depth)
 
-    # Write to file
+def write_positions(positions: PositionTable,
+                    file_path: str = "Board_Evals/precomputed_moves.py") -> None:
+    """Write (score, move, depth) positions, sorted by hash, as a PRECOMPUTED_MOVES module."""
     script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     full_path = os.path.join(script_dir, file_path)
 
     with open(full_path, 'w') as f:
         f.write('"""Precomputed moves: zobrist hashes mapped to (score, move, depth) tuples for board positions."""\n\n')
         f.write('PRECOMPUTED_MOVES = {\n')
-        for hash_val, (score, move, depth) in sorted(all_positions.items()):
+        for hash_val, (score, move, depth) in sorted(positions.items()):
             f.write(f'    {hash_val}: ({score}, {move}, {depth}),\n')
         f.write('}\n')
 
+
+def save_positions(*transposition_tables: TranspositionTable,
+                   file_path: str = "Board_Evals/precomputed_moves.py") -> int:
+    """Save all positions from transposition tables to file. Returns number of new positions."""
+    # Merge all positions from all tables
+    all_positions: PositionTable = dict(PRECOMPUTED_MOVES)
+
+    for tt in transposition_tables:
+        for hash_val, (score, depth, move, flag) in tt.items():
+            # Bounds from cutoffs are not solved scores, only keep exact entries
+            if move is not None and flag == EXACT:
+                existing = all_positions.get(hash_val)
+                if existing is None or depth > existing[2]:
+                    all_positions[hash_val] = (score, move, depth)
+
+    write_positions(all_positions, file_path)
+
     new_count = len(all_positions) - len(PRECOMPUTED_MOVES)
 
     # Print summary
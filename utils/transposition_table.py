@@ -1,53 +1,158 @@
 """Transposition table for caching evaluated positions."""
-from typing import Optional, Tuple
+from array import array
+from typing import Iterator, Optional, Tuple
 
 from Board_Evals.precomputed_moves import PRECOMPUTED_MOVES
-from utils.engine import GameBoard
+
+# Bound types: how a stored score relates to the true value of the position
+EXACT = 0
+LOWER = 1  # Search failed high, true score >= stored score
+UPPER = 2  # Search failed low, true score <= stored score
+
+# (score, depth, best_move, flag)
+Entry = Tuple[int, int, Optional[int], int]
+
+_EMPTY = -1  # depth of an unused slot; also stands in for a missing best move
 
 
 class TranspositionTable:
-    def __init__(self):
-        # hash -> (score, depth, best_move)
-        self.table: dict[int, Tuple[int, int, Optional[int]]] = {}
-        # Load precomputed moves: hash -> (score, move, depth)
-        for hash_value, (score, move, depth) in PRECOMPUTED_MOVES.items():
-            self.table[hash_value] = (score, depth, move)
-
-    def get(self, hash_key: int, depth: int, alpha: float, beta: float) -> Optional[Tuple[int, Optional[int]]]:
-        """Get transposition table entry if depth is sufficient or bounds are valid."""
-        entry = self.table.get(hash_key)
-        if entry is None:
-            return None
-
-        score, entry_depth, best_move = entry
-        if entry_depth >= depth or score >= beta or score <= alpha:
+    # Number of slots is 2^SIZE_LOG2, in buckets of two indexed by the low bits of the hash:
+    # the first slot keeps the deepest result, the second always takes the latest one
+    SIZE_LOG2 = 20
+
+    def __init__(self, size_log2: int = SIZE_LOG2):
+        self.size = 1 << size_log2
+        self.mask = self.size - 2
+        # Slots that hold an entry, so items() and clear() need not walk the whole table
+        self._filled = set()
+        self._allocate()
+
+    def _allocate(self) -> None:
+        # Fixed-width columns in contiguous memory (no per-entry objects for the GC to walk).
+        # Precomputed moves are not copied in, they are read from PRECOMPUTED_MOVES on a miss.
+        # Repetition writes every element, so all pages are mapped here rather than on the
+        # first stores, which would stall the bot's first timed move.
+        self.keys = array('Q', [0]) * self.size
+        self.scores = array('b', [0]) * self.size
+        self.depths = array('b', [_EMPTY]) * self.size
+        self.moves = array('b', [_EMPTY]) * self.size
+        self.flags = array('b', [0]) * self.size
+
+    def __len__(self) -> int:
+        return len(self._filled)
+
+    def _entry(self, index: int) -> Entry:
+        move = self.moves[index]
+        return (self.scores[index], self.depths[index],
+                None if move == _EMPTY else move, self.flags[index])
+
+    def _find(self, hash_key: int) -> int:
+        """Slot holding the position, or _EMPTY if neither slot of its bucket does."""
+        index = hash_key & self.mask
+        keys, depths = self.keys, self.depths
+        if keys[index] == hash_key and depths[index] != _EMPTY:
+            return index
+        index += 1
+        if keys[index] == hash_key and depths[index] != _EMPTY:
+            return index
+        return _EMPTY
+
+    def probe(self, hash_key: int) -> Optional[Entry]:
+        """Get the stored entry for a position, falling back to precomputed moves."""
+        index = self._find(hash_key)
+        if index != _EMPTY:
+            return self._entry(index)
+        book = PRECOMPUTED_MOVES.get(hash_key)
+        if book is not None:
+            score, move, depth = book
+            return (score, depth, move, EXACT)
+        return None
+
+    def get(self, hash_key: int, depth: int, alpha: int, beta: int) -> Optional[Tuple[int, Optional[int]]]:
+        """Get transposition table entry if depth is sufficient and its bound settles the window."""
+        index = hash_key & self.mask
+        keys, depths = self.keys, self.depths
+        if keys[index] != hash_key or depths[index] == _EMPTY:
+            index += 1
+        if keys[index] == hash_key and depths[index] != _EMPTY:
+            entry_depth = depths[index]
+            if entry_depth < depth:
+                return None
+            score, flag = self.scores[index], self.flags[index]
+            best_move = self.moves[index]
+            if best_move == _EMPTY:
+                best_move = None
+        else:
+            book = PRECOMPUTED_MOVES.get(hash_key)
+            if book is None:
+                return None
+            score, best_move, entry_depth = book
+            flag = EXACT
+            if entry_depth < depth:
+                return None
+
+        if flag == EXACT or (flag == LOWER and score >= beta) or (flag == UPPER and score <= alpha):
             return (score, best_move)
 
         return None
 
     def get_best_move(self, hash_key: int) -> Optional[int]:
         """Get best move for move ordering, even if depth is insufficient."""
-        entry = self.table.get(hash_key)
-        return entry[2] if entry else None
+        index = self._find(hash_key)
+        if index != _EMPTY:
+            move = self.moves[index]
+            return None if move == _EMPTY else move
+        book = PRECOMPUTED_MOVES.get(hash_key)
+        return book[1] if book else None
 
     def get_score(self, hash_key: int) -> Optional[int]:
         """Get score for move ordering, even if depth is insufficient."""
-        entry = self.table.get(hash_key)
-        return entry[0] if entry else None
+        index = self._find(hash_key)
+        if index != _EMPTY:
+            return self.scores[index]
+        book = PRECOMPUTED_MOVES.get(hash_key)
+        return book[0] if book else None
 
     def get_depth(self, hash_key: int) -> Optional[int]:
         """Get depth of stored entry, if any."""
-        entry = self.table.get(hash_key)
+        entry = self.probe(hash_key)
         return entry[1] if entry else None
 
-    def store(self, hash_key: int, score: int, depth: int, best_move: Optional[int] = None) -> None:
-        """Store entry only if depth is greater than or equal to existing entry."""
-        existing = self.table.get(hash_key)
-        if existing is None or depth >= existing[1]:
-            self.table[hash_key] = (score, depth, best_move)
+    def store(self, hash_key: int, score: int, depth: int, best_move: Optional[int] = None,
+              flag: int = EXACT) -> None:
+        """Store entry unless the precomputed moves or the table hold a deeper result for it."""
+        book = PRECOMPUTED_MOVES.get(hash_key)
+        if book is not None and depth < book[2]:
+            return
+        index = hash_key & self.mask
+        existing_depth = self.depths[index]
+        if depth < existing_depth:
+            if self.keys[index] == hash_key:
+                return
+            # A deeper result for another position holds the first slot, use the second
+            index += 1
+            existing_depth = self.depths[index]
+        elif self.keys[index + 1] == hash_key and self.depths[index + 1] != _EMPTY:
+            # The position moves up to the first slot, drop its older copy from the second
+            self.depths[index + 1] = _EMPTY
+            self._filled.discard(index + 1)
+        if existing_depth == _EMPTY:
+            self._filled.add(index)
+        self.keys[index] = hash_key
+        self.scores[index] = score
+        self.depths[index] = depth
+        self.moves[index] = _EMPTY if best_move is None else best_move
+        self.flags[index] = flag
+
+    def items(self) -> Iterator[Tuple[int, Entry]]:
+        """Iterate over searched positions as (hash, (score, depth, best_move, flag))."""
+        for index in sorted(self._filled):
+            yield self.keys[index], self._entry(index)
 
     def clear(self) -> None:
-        """Clear the table but preserve precomputed moves by reloading them."""
-        self.table.clear()
-        for hash_value, (score, move, depth) in PRECOMPUTED_MOVES.items():
-            self.table[hash_value] = (score, depth, move)
+        """Clear searched positions; precomputed moves stay available."""
+        # A slot is unused once its depth is _EMPTY, the other columns are overwritten on reuse
+        depths = self.depths
+        for index in self._filled:
+            depths[index] = _EMPTY
+        self._filled.clear()
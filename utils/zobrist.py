@@ -14,6 +14,18 @@ class ZobristHasher:
         self.player_to_move_hash = rng.getrandbits(64)
         self.table_stride = GameBoard.WIDTH * GameBoard.HEIGHT
 
+        # Keys for playing a move, indexed [player][bit position] (bit_pos = col * (HEIGHT + 1) + row),
+        # with the switch of player to move folded in: hash ^ move_keys[player][bit_pos]
+        self.move_keys = (None,) + tuple(
+            [self._move_key(player, bit_pos) for bit_pos in range(GameBoard.WIDTH * (GameBoard.HEIGHT + 1))]
+            for player in (Player.PLAYER1, Player.PLAYER2))
+
+    def _move_key(self, player: Player, bit_pos: int) -> int:
+        col, row = divmod(bit_pos, GameBoard.HEIGHT + 1)
+        if row == GameBoard.HEIGHT:  # Sentinel row, never holds a piece
+            return 0
+        return self.update_hash(0, col, row, player)
+
     def compute_hash(self, board: GameBoard) -> int:
         """Compute hash by XORing table entries for all pieces on the board."""
         hash_value = 0